@@ -0,0 +1,39 @@
+import json
+import sys
+import timeit
+import numpy as np
+import pandas as pd
+
+# Compares the old float-rupee money path with the int64 paisa path on
+# synthetic sale lines. Run with: python bench_money.py [lines]
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+rng = np.random.default_rng(0)
+qty = rng.integers(1, 20, N, dtype=np.int64)
+price_paisa = rng.integers(100, 10_000_000, N, dtype=np.int64)
+price_float = price_paisa / 100
+cart = [{"product_id": i, "name": "Item", "quantity": int(q), "price": float(p)} for i, (q, p) in enumerate(zip(qty[:20], price_float[:20]))]
+cart_paisa = [{"product_id": i, "name": "Item", "quantity": int(q), "price_paisa": int(p)} for i, (q, p) in enumerate(zip(qty[:20], price_paisa[:20]))]
+sales_float = pd.DataFrame({"grand_total": qty * price_float})
+sales_paisa = pd.DataFrame({"grand_total_paisa": qty * price_paisa})
+
+def bench(label, fn, number):
+    best = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"{label:<40} {best * 1e6:10.2f} us")
+
+print(f"{N} sale lines")
+bench("line totals float64", lambda: qty * price_float, 10)
+bench("line totals int64", lambda: qty * price_paisa, 10)
+bench("analytics sum float64 (pandas)", lambda: sales_float["grand_total"].sum(), 10)
+bench("analytics sum int64 (pandas)", lambda: sales_paisa["grand_total_paisa"].sum(), 10)
+bench("cart total float (python sum)", lambda: sum(i["quantity"] * i["price"] for i in cart), 10_000)
+bench("cart total int64 (np.fromiter dot)", lambda: int(
+    np.fromiter((i["quantity"] for i in cart_paisa), dtype=np.int64, count=len(cart_paisa))
+    @ np.fromiter((i["price_paisa"] for i in cart_paisa), dtype=np.int64, count=len(cart_paisa))), 10_000)
+bench("cart total int (python sum)", lambda: sum(i["quantity"] * i["price_paisa"] for i in cart_paisa), 10_000)
+bench("json encode float cart", lambda: json.dumps(cart), 10_000)
+bench("json encode int cart", lambda: json.dumps(cart_paisa), 10_000)
+
+exact = int((qty * price_paisa).sum())
+drift = float((qty * price_float).sum()) * 100 - exact
+print(f"float sum drift vs exact paisa total: {drift:.4f} paisa")
@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from fpdf import FPDF
@@ -7,24 +8,68 @@ from datetime import datetime
 import webbrowser
 import tkinter.font as tkFont
 import json
+import shutil
+from decimal import Decimal, ROUND_HALF_UP
+import csv
+import bisect
+import heapq
+import threading
+import queue
+import time
+import itertools
+import contextlib
+from collections import Counter, deque
+from concurrent.futures import Future
+from multiprocessing import shared_memory, resource_tracker
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
 # ========== Utility Functions ==========
+# Money is kept as integer paisa (1 Rs = 100 paisa) everywhere; rupees are only
+# used for user input and display.
+def to_paisa(value):
+    # Parse a rupee amount typed by the user, e.g. "1250.5" -> 125050
+    return int((Decimal(str(value).strip()) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+def rupees_to_paisa(values):
+    # Vectorized conversion of legacy float rupee columns
+    return np.rint(pd.to_numeric(values, errors="coerce").fillna(0).to_numpy(dtype=np.float64) * 100).astype(np.int64)
+
+def format_rs(paisa):
+    paisa = int(paisa)
+    sign = "-" if paisa < 0 else ""
+    return f"{sign}{abs(paisa) // 100}.{abs(paisa) % 100:02d}"
+
+INVENTORY_COLUMNS = ["product_id", "name", "brand", "category", "quantity", "price_paisa"]
+
 def load_inventory():
     try:
         df = pd.read_csv("inventory.csv")
         # Ensure all required columns exist
-        required_cols = ["product_id", "name", "brand", "category", "quantity", "price"]
+        required_cols = INVENTORY_COLUMNS
         for col in required_cols:
             if col not in df.columns:
                 df[col] = None
+        df["price_paisa"] = df["price_paisa"].fillna(0).astype(np.int64)
         return df[required_cols]
     except Exception:
-        return pd.DataFrame(columns=["product_id", "name", "brand", "category", "quantity", "price"])
+        return pd.DataFrame(columns=INVENTORY_COLUMNS)
+
+# Held while inventory.csv is being read-modified-written
+inventory_lock = threading.RLock()
 
 def save_inventory(df):
-    df.to_csv("inventory.csv", index=False)
+    # Write to a temp file and swap it in so readers never see a half-written file
+    with inventory_lock:
+        with open("inventory.csv.tmp", "w", newline="", encoding="utf-8") as f:
+            df.to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace("inventory.csv.tmp", "inventory.csv")
 
 def generate_invoice(items, total, customer_name="Customer", discount=0):
     pdf = FPDF()
@@ -65,24 +110,24 @@ def generate_invoice(items, total, customer_name="Customer", discount=0):
     for item in items:
         name = item['name'][:30]
         qty = item['quantity']
-        price = item['price']
+        price = item['price_paisa']
         amount = qty * price
         pdf.cell(70, 8, name, 1)
         pdf.cell(25, 8, str(qty), 1, 0, 'C')
-        pdf.cell(45, 8, f"{price:.2f}", 1, 0, 'R')
-        pdf.cell(45, 8, f"{amount:.2f}", 1, 1, 'R')
+        pdf.cell(45, 8, format_rs(price), 1, 0, 'R')
+        pdf.cell(45, 8, format_rs(amount), 1, 1, 'R')
 
     pdf.set_font("Arial", 'B', 11)
     pdf.cell(140, 8, "Total Amount", 1)
-    pdf.cell(45, 8, f"Rs {total:.2f}", 1, 1, 'R')
+    pdf.cell(45, 8, f"Rs {format_rs(total)}", 1, 1, 'R')
 
     if discount > 0:
         pdf.set_font("Arial", '', 11)
         pdf.cell(140, 8, "Discount", 1)
-        pdf.cell(45, 8, f"- Rs {discount:.2f}", 1, 1, 'R')
+        pdf.cell(45, 8, f"- Rs {format_rs(discount)}", 1, 1, 'R')
         pdf.set_font("Arial", 'B', 12)
         pdf.cell(140, 8, "Grand Total", 1)
-        pdf.cell(45, 8, f"Rs {total-discount:.2f}", 1, 1, 'R')
+        pdf.cell(45, 8, f"Rs {format_rs(total - discount)}", 1, 1, 'R')
 
     pdf.ln(10)
     pdf.set_font("Arial", '', 10)
@@ -101,41 +146,1020 @@ def generate_invoice(items, total, customer_name="Customer", discount=0):
         filename = safe_filename
     return filename
 
-def save_sale(items, total, customer_name, discount):
-    # Convert all items to pure Python types
-    def to_py(obj):
-        if isinstance(obj, dict):
-            return {k: to_py(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [to_py(x) for x in obj]
-        elif hasattr(obj, 'item'):
-            return obj.item()
-        else:
-            return obj
-
-    items_py = to_py(items)
+def cart_total(items):
+    # Carts are a handful of lines, where plain int arithmetic beats numpy (see bench_money.py)
+    return sum(item['quantity'] * item['price_paisa'] for item in items)
 
-    df = pd.DataFrame([{
+def sale_row(items, total, customer_name, discount):
+    # Bill items only hold Python ints and strings, so they encode directly
+    return {
         "date": datetime.now().strftime('%Y-%m-%d'),
         "time": datetime.now().strftime('%H:%M:%S'),
         "customer": customer_name,
-        "items": json.dumps(items_py),  # Save as JSON string
-        "total": float(total),
-        "discount": float(discount),
-        "grand_total": float(total) - float(discount)
-    }])
+        "items": json.dumps(items),  # Save as JSON string
+        "total_paisa": total,
+        "discount_paisa": discount,
+        "grand_total_paisa": total - discount
+    }
+
+def parse_items(items_json):
+    return json.loads(items_json.replace("'", '"'))
+
+def convert_money_files():
+    # One-time conversion of float rupee files to integer paisa. The originals
+    # are kept as *.bak; files already in paisa are left alone.
+    if os.path.exists("inventory.csv"):
+        df = pd.read_csv("inventory.csv")
+        if "price" in df.columns and "price_paisa" not in df.columns:
+            shutil.copyfile("inventory.csv", "inventory.csv.bak")
+            df.insert(df.columns.get_loc("price"), "price_paisa", rupees_to_paisa(df["price"]))
+            save_inventory(df.drop(columns=["price"]))
+
     if os.path.exists("sales.csv"):
-        df.to_csv("sales.csv", mode='a', header=False, index=False)
+        with open("sales.csv", encoding="utf-8") as f:
+            header = f.readline().strip().split(",")
+        if "grand_total" not in header:
+            return
+        shutil.copyfile("sales.csv", "sales.csv.bak")
+        with open("sales.csv.tmp", "w", newline="", encoding="utf-8") as out:
+            for i, chunk in enumerate(pd.read_csv("sales.csv", chunksize=5000)):
+                for col in ["total", "discount", "grand_total"]:
+                    chunk[col] = rupees_to_paisa(chunk[col])
+                chunk = chunk.rename(columns={"total": "total_paisa", "discount": "discount_paisa", "grand_total": "grand_total_paisa"})
+                chunk["items"] = [json.dumps([{
+                    "product_id": item["product_id"],
+                    "name": item["name"],
+                    "quantity": item["quantity"],
+                    "price_paisa": to_paisa(item["price"]),
+                    "total_paisa": to_paisa(item["total"])
+                } for item in parse_items(items_json)]) for items_json in chunk["items"]]
+                chunk.to_csv(out, header=(i == 0), index=False)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace("sales.csv.tmp", "sales.csv")
+
+# ========== Stock Alerts ==========
+DEFAULT_MIN_STOCK = 5
+
+def load_thresholds():
+    # {"default": n, "categories": {category: n}, "products": {"product_id": n}}
+    thresholds = {"default": DEFAULT_MIN_STOCK, "categories": {}, "products": {}}
+    try:
+        with open("stock_thresholds.json", encoding="utf-8") as f:
+            thresholds.update(json.load(f))
+    except (FileNotFoundError, ValueError):
+        pass
+    return thresholds
+
+# Every committed stock, name or category change is appended here as one JSON
+# line, so each counter re-scores only the SKUs that changed anywhere
+STOCK_LOG = "stock_changes.log"
+STOCK_POLL_MS = 2000
+
+def log_stock_changes(changes):
+    # Caller holds commit.lock
+    if not changes:
+        return
+    with open(STOCK_LOG, "a", encoding="utf-8", newline="\n") as f:
+        f.write("".join(json.dumps(change) + "\n" for change in changes))
+        f.flush()
+        os.fsync(f.fileno())
+
+def save_thresholds(thresholds):
+    with open("stock_thresholds.json", "w", encoding="utf-8") as f:
+        json.dump(thresholds, f, indent=2)
+
+class StockMonitor:
+    # Keeps every SKU in a min-heap keyed by quantity - minimum, so only the
+    # products touched by a sale or edit are re-scored. Heap entries go stale
+    # when a SKU changes and are skipped/compacted lazily.
+    def __init__(self, thresholds):
+        self.thresholds = thresholds
+        self.entries = {}      # product_id -> {"name", "category", "quantity", "minimum", "gap"}
+        self.by_category = {}  # category -> set of product_ids
+        self.heap = []         # (gap, product_id)
+        self.low = set()       # product_ids below their minimum
+        self.log_offset = 0    # bytes of stock_changes.log already applied
+
+    def minimum(self, pid, category):
+        products = self.thresholds["products"]
+        if str(pid) in products:
+            return int(products[str(pid)])
+        return int(self.thresholds["categories"].get(category, self.thresholds["default"]))
+
+    def rebuild(self, df):
+        self.entries, self.by_category, self.low = {}, {}, set()
+        for pid, name, category, qty in zip(df["product_id"], df["name"], df["category"], df["quantity"]):
+            self._set(int(pid), str(name), str(category), int(qty))
+        self.heap = [(e["gap"], pid) for pid, e in self.entries.items()]
+        heapq.heapify(self.heap)
+
+    def _set(self, pid, name, category, qty):
+        old = self.entries.get(pid)
+        if old and old["category"] != category:
+            self.by_category[old["category"]].discard(pid)
+        self.by_category.setdefault(category, set()).add(pid)
+        minimum = self.minimum(pid, category)
+        self.entries[pid] = {"name": name, "category": category, "quantity": qty, "minimum": minimum, "gap": qty - minimum}
+        was_low = pid in self.low
+        if qty < minimum:
+            self.low.add(pid)
+        else:
+            self.low.discard(pid)
+        return qty < minimum and not was_low
+
+    def update(self, pid, name=None, category=None, qty=None):
+        # Re-score one SKU; returns True when it has just dropped below its minimum
+        pid = int(pid)
+        old = self.entries.get(pid, {})
+        newly_low = self._set(pid,
+                              name if name is not None else old.get("name", ""),
+                              category if category is not None else old.get("category", ""),
+                              int(qty) if qty is not None else old.get("quantity", 0))
+        heapq.heappush(self.heap, (self.entries[pid]["gap"], pid))
+        if len(self.heap) > 2 * len(self.entries) + 64:
+            self.heap = [(e["gap"], p) for p, e in self.entries.items()]
+            heapq.heapify(self.heap)
+        return newly_low
+
+    def remove(self, pid):
+        entry = self.entries.pop(int(pid), None)
+        if entry:
+            self.by_category[entry["category"]].discard(int(pid))
+            self.low.discard(int(pid))
+
+    def follow(self, path=STOCK_LOG):
+        # Call before loading the inventory passed to rebuild(); later changes are
+        # picked up by sync()
+        self.log_offset = os.path.getsize(path) if os.path.exists(path) else 0
+
+    def has_changes(self, path=STOCK_LOG):
+        return os.path.exists(path) and os.path.getsize(path) > self.log_offset
+
+    def sync(self, path=STOCK_LOG):
+        # Re-score the SKUs changed since the last sync; returns the ones that
+        # just dropped below their minimum
+        newly_low = []
+        if not self.has_changes(path):
+            return newly_low
+        with open(path, "rb") as f:
+            f.seek(self.log_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # still being written
+                self.log_offset += len(line)
+                change = json.loads(line)
+                if change.get("deleted"):
+                    self.remove(change["pid"])
+                elif self.update(change["pid"], change.get("name"), change.get("category"), change.get("qty")):
+                    newly_low.append(change["pid"])
+        return [pid for pid in newly_low if pid in self.low]
+
+    def set_product_minimum(self, pid, minimum):
+        if minimum is None:
+            self.thresholds["products"].pop(str(pid), None)
+        else:
+            self.thresholds["products"][str(pid)] = int(minimum)
+        if int(pid) in self.entries:
+            self.update(pid)
+
+    def set_category_minimum(self, category, minimum):
+        if minimum is None:
+            self.thresholds["categories"].pop(category, None)
+        else:
+            self.thresholds["categories"][category] = int(minimum)
+        for pid in list(self.by_category.get(category, ())):
+            self.update(pid)
+
+    def nearest(self, n=10):
+        # The n SKUs closest to (or furthest below) their minimum
+        result, seen, popped = [], set(), []
+        while self.heap and len(result) < n:
+            gap, pid = heapq.heappop(self.heap)
+            entry = self.entries.get(pid)
+            if entry is None or entry["gap"] != gap or pid in seen:
+                continue  # stale
+            seen.add(pid)
+            popped.append((gap, pid))
+            result.append(dict(entry, product_id=pid))
+        for item in popped:
+            heapq.heappush(self.heap, item)
+        return result
+
+    def alerts(self):
+        return sorted((dict(self.entries[pid], product_id=pid) for pid in self.low), key=lambda e: e["gap"])
+
+# ========== Group Commit ==========
+COMMIT_WINDOW_MS = 50
+COMMIT_SPOOL = "commit_spool"
+COMMIT_LOCK = "commit.lock"
+COMMIT_INTENT = "commit.intent"
+COMMIT_ACK_TTL = 600  # seconds an unclaimed ack is kept for a live counter
+COMMIT_STATS_WINDOW = 60  # seconds covered by the throughput figures
+
+def _lock_file(f):
+    # Exclusive lock shared by every counter process using this data folder
+    if os.name == "nt":
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                pass  # LK_LOCK gives up after ~10 s, keep waiting
+    else:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+def _unlock_file(f):
+    if os.name == "nt":
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
     else:
-        df.to_csv("sales.csv", mode='w', header=True, index=False)
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def _write_json(path, obj):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+# A commit is first written to commit.intent: the sales.csv size before the
+# append, the rows to append, the new stock of every product it touches and the
+# acks to hand out. Applying an intent twice gives the same files, so whoever
+# takes commit.lock next finishes a commit that was cut short by a crash.
+def _truncate_sales(size):
+    if os.path.exists("sales.csv"):
+        with open("sales.csv", "r+b") as f:
+            f.truncate(size)
+            f.flush()
+            os.fsync(f.fileno())
+
+def _apply_stock(intent):
+    with open("sales.csv", "ab") as f:
+        f.truncate(intent["sales_size"])
+        f.write(intent["sales_text"].encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+    if intent["stock"]:
+        df = load_inventory()
+        stock = {int(pid): qty for pid, qty in intent["stock"].items()}
+        touched = df["product_id"].isin(list(stock))
+        if touched.sum() != len(stock):
+            raise ValueError("inventory.csv could not be read back for the commit")
+        df.loc[touched, "quantity"] = df.loc[touched, "product_id"].map(stock)
+        save_inventory(df)
+
+def _apply_acks(intent):
+    log_stock_changes([{"pid": int(pid), "qty": qty} for pid, qty in intent["stock"].items()])
+    for path, ack in intent["acks"].items():
+        _write_json(path, ack)
+    for path in intent["spooled"]:
+        _remove(path)
+
+def recover_commit():
+    # Caller holds commit.lock
+    if not os.path.exists(COMMIT_INTENT):
+        return
+    with open(COMMIT_INTENT, encoding="utf-8") as f:
+        intent = json.load(f)
+    _apply_stock(intent)
+    _apply_acks(intent)
+    os.remove(COMMIT_INTENT)
+
+@contextlib.contextmanager
+def commit_lock():
+    # Every change to sales.csv or inventory.csv happens under this lock, after
+    # any commit left behind by a crashed counter has been finished
+    with open(COMMIT_LOCK, "a+b") as lock:
+        _lock_file(lock)
+        try:
+            recover_commit()
+            yield
+        finally:
+            _unlock_file(lock)
+
+class CommitBatcher:
+    # Group commit shared by all counters working on the same data folder.
+    # Each checkout is spooled to commit_spool/<id>.json. After window_ms the
+    # process that gets commit.lock commits every spooled checkout, its own and
+    # other counters', with one sales.csv append and one inventory.csv rewrite,
+    # and writes an <id>.ack for each. Every checkout's Future is resolved
+    # from its own ack.
+    def __init__(self, window_ms=COMMIT_WINDOW_MS, spool=COMMIT_SPOOL):
+        self.window = window_ms / 1000
+        self.spool = spool
+        os.makedirs(spool, exist_ok=True)
+        self.pending = queue.Queue()
+        self.ids = itertools.count()
+        self.waiting = {}  # checkout id -> Future, spooled but not acknowledged yet
+        self.batch_sizes = Counter()
+        self.committed = 0
+        self.busy = 0.0  # seconds spent committing
+        self.recent = deque()  # (time, checkouts) per batch in the stats window
+        self.started = time.monotonic()
+        self.last_error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, row, decrements):
+        # decrements: {product_id: quantity sold}. Returns at once; the Future
+        # resolves to {product_id: stock left} or raises why it was rejected.
+        future = Future()
+        self.pending.put((row, decrements, future))
+        return future
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch = []
+            try:
+                # Spooled checkouts without an ack are retried every window
+                first = self.pending.get(timeout=self.window if self.waiting else None)
+            except queue.Empty:
+                first = ()
+            if first is None:
+                stop = True
+            elif first:
+                batch.append(first)
+                deadline = time.monotonic() + self.window
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        entry = self.pending.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if entry is None:
+                        stop = True
+                        break
+                    batch.append(entry)
+            self._flush(batch)
+        for future in self.waiting.values():
+            future.set_exception(RuntimeError("Counter closed before the sale was confirmed; it may still be committed by another counter."))
+        self.waiting.clear()
+
+    def _path(self, cid, ext):
+        return os.path.join(self.spool, f"{cid}.{ext}")
+
+    def _flush(self, batch):
+        for row, decrements, future in batch:
+            cid = f"{os.getpid()}-{next(self.ids)}"
+            try:
+                _write_json(self._path(cid, "json"), {"row": row, "decrements": {str(p): int(q) for p, q in decrements.items()}})
+            except Exception as e:
+                # Never spooled, so no counter can commit it
+                _remove(self._path(cid, "json.tmp"))
+                future.set_exception(e)
+                continue
+            self.waiting[cid] = future
+        if not self.waiting:
+            return
+        try:
+            with commit_lock():
+                self._commit_spool()
+                self._clean_acks()
+        except Exception as e:
+            # Spooled checkouts stay waiting; they are committed by the next
+            # attempt here or by another counter
+            self.last_error = e
+        for cid in list(self.waiting):
+            path = self._path(cid, "ack")
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as f:
+                ack = json.load(f)
+            os.remove(path)
+            future = self.waiting.pop(cid)
+            if "error" in ack:
+                future.set_exception(ValueError(ack["error"]))
+            else:
+                future.set_result({int(pid): qty for pid, qty in ack["remaining"].items()})
+
+    def _commit_spool(self):
+        # Caller holds commit.lock
+        names = [n for n in os.listdir(self.spool) if n.endswith(".json")]
+        if not names:
+            return  # another counter already committed ours
+        started = time.perf_counter()
+        names.sort(key=lambda n: os.stat(os.path.join(self.spool, n)).st_mtime_ns)
+        entries = []
+        for name in names:
+            with open(os.path.join(self.spool, name), encoding="utf-8") as f:
+                entries.append((name[:-5], json.load(f)))
+
+        df = load_inventory()
+        positions = {pid: i for i, pid in enumerate(df["product_id"])}
+        stock = df["quantity"].to_numpy().copy()
+        acks = {}
+        accepted = []
+        for cid, entry in entries:
+            decrements = {int(pid): qty for pid, qty in entry["decrements"].items()}
+            error = None
+            for pid, qty in decrements.items():
+                if pid not in positions:
+                    error = f"Product {pid} no longer exists!"
+                elif stock[positions[pid]] < qty:
+                    error = f"Not enough stock for product {pid}!"
+            if error:
+                acks[self._path(cid, "ack")] = {"error": error}
+                continue
+            for pid, qty in decrements.items():
+                stock[positions[pid]] -= qty
+            accepted.append((cid, entry["row"], decrements))
+        # Each checkout is acknowledged with the stock left for its products
+        touched = set()
+        for cid, _, decrements in accepted:
+            acks[self._path(cid, "ack")] = {"remaining": {str(pid): int(stock[positions[pid]]) for pid in decrements}}
+            touched.update(decrements)
+
+        sales_size = os.path.getsize("sales.csv") if os.path.exists("sales.csv") else 0
+        sales_text = ""
+        if accepted:
+            sales_text = pd.DataFrame([row for _, row, _ in accepted], columns=SALES_COLUMNS).to_csv(index=False, header=sales_size == 0)
+        intent = {
+            "sales_size": sales_size,
+            "sales_text": sales_text,
+            "stock": {str(pid): int(stock[positions[pid]]) for pid in touched},
+            "acks": acks,
+            "spooled": [os.path.join(self.spool, name) for name in names],
+        }
+        _write_json(COMMIT_INTENT, intent)
+        try:
+            _apply_stock(intent)
+        except Exception as e:
+            # Nothing is committed: take the rows back out of sales.csv
+            # before rejecting the checkouts, so a retry cannot double them
+            _truncate_sales(sales_size)
+            os.remove(COMMIT_INTENT)
+            intent["stock"] = {}
+            intent["acks"] = {self._path(cid, "ack"): {"error": f"Commit failed! {e}"} for cid, _ in entries}
+            accepted = []
+        _apply_acks(intent)
+        _remove(COMMIT_INTENT)
+
+        if accepted:
+            self.batch_sizes[len(accepted)] += 1
+            self.committed += len(accepted)
+            now = time.monotonic()
+            self.recent.append((now, len(accepted)))
+            while self.recent[0][0] < now - COMMIT_STATS_WINDOW:
+                self.recent.popleft()
+        self.busy += time.perf_counter() - started
+
+    def _clean_acks(self):
+        # Caller holds commit.lock. Acks whose counter has exited, or that
+        # nobody collected in COMMIT_ACK_TTL, would otherwise pile up
+        now = time.time()
+        for name in os.listdir(self.spool):
+            if not name.endswith(".ack"):
+                continue
+            pid = int(name.split("-")[0])
+            if pid == os.getpid():
+                continue
+            path = os.path.join(self.spool, name)
+            try:
+                if not _owner_alive(pid) or now - os.stat(path).st_mtime > COMMIT_ACK_TTL:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        # Batches committed by this process. The rates are per wall-clock second
+        # over the last COMMIT_STATS_WINDOW seconds; capacity is checkouts per
+        # second spent committing.
+        now = time.monotonic()
+        recent = [n for t, n in list(self.recent) if t >= now - COMMIT_STATS_WINDOW]
+        span = min(COMMIT_STATS_WINDOW, now - self.started) or 1e-9
+        return {
+            "checkouts": self.committed,
+            "batches": sum(self.batch_sizes.values()),
+            "checkouts_per_sec": sum(recent) / span,
+            "batches_per_sec": len(recent) / span,
+            "busy_seconds": self.busy,
+            "capacity_per_sec": self.committed / self.busy if self.busy else 0.0,
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+        }
+
+    def close(self):
+        self.pending.put(None)
+        self.thread.join()
+
+# ========== Shared Inventory ==========
+# Hot inventory columns live in one shared memory block per generation so worker
+# processes can read stock without loading inventory.csv. Block layout:
+#   product_id int64[n] | quantity int64[n] | price_paisa int64[n]
+#   then per string column: codes int32[n] | offsets int64[k+1] | utf-8 blob
+# The header block holds [generation, n, k_name, blob_name, k_brand, blob_brand, ..., owner_pid].
+# Every app instance publishes under its own prefix; the latest one is recorded
+# in shared_inventory.json so other processes can find it.
+SHARED_PREFIX = "electrohub_inventory"
+SHARED_DISCOVERY = "shared_inventory.json"
+SHARED_NUMERIC = [("product_id", np.int64), ("quantity", np.int64), ("price_paisa", np.int64)]
+SHARED_STRINGS = ["name", "brand", "category"]
+SHARED_HEADER_LEN = 3 + 2 * len(SHARED_STRINGS)
+SHARED_OWNER = SHARED_HEADER_LEN - 1
+
+def _align(n):
+    return (n + 7) & ~7
+
+def _shared_layout(header):
+    # Returns {column: (dtype, offset, count)} for the data block described by header
+    nrows = int(header[1])
+    layout = {}
+    pos = 0
+    for col, dtype in SHARED_NUMERIC:
+        layout[col] = (dtype, pos, nrows)
+        pos += 8 * nrows
+    for i, col in enumerate(SHARED_STRINGS):
+        ncats, blob_len = int(header[2 + 2 * i]), int(header[3 + 2 * i])
+        layout[col + "_codes"] = (np.int32, pos, nrows)
+        pos += _align(4 * nrows)
+        layout[col + "_offsets"] = (np.int64, pos, ncats + 1)
+        pos += 8 * (ncats + 1)
+        layout[col + "_blob"] = (np.uint8, pos, blob_len)
+        pos += _align(blob_len)
+    return layout, max(pos, 8)
+
+def _owner_alive(pid):
+    if os.name != "posix":
+        return True  # Windows frees a block once no live process holds it
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _unlink_shm(shm):
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass  # already removed
+
+def _create_shm(name, size):
+    # Only used for data blocks under a prefix whose header we own, so an
+    # existing block is left over from a crashed run with the same prefix
+    try:
+        return shared_memory.SharedMemory(name=name, create=True, size=size)
+    except FileExistsError:
+        stale = _attach_shm(name)
+        stale.close()
+        _unlink_shm(stale)
+        return shared_memory.SharedMemory(name=name, create=True, size=size)
+
+def _create_header(prefix):
+    name = f"{prefix}_hdr"
+    try:
+        return shared_memory.SharedMemory(name=name, create=True, size=8 * SHARED_HEADER_LEN)
+    except FileExistsError:
+        existing = _attach_shm(name)
+        header = np.ndarray((SHARED_HEADER_LEN,), dtype=np.int64, buffer=existing.buf)
+        owner = int(header[SHARED_OWNER])
+        del header
+        existing.close()
+        if _owner_alive(owner):
+            raise FileExistsError(f"Shared inventory '{prefix}' is already published by process {owner}")
+        _unlink_shm(existing)
+        return shared_memory.SharedMemory(name=name, create=True, size=8 * SHARED_HEADER_LEN)
+
+_attach_lock = threading.Lock()
+
+def _attach_shm(name):
+    # Readers must never unlink the owner's block
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # Before Python 3.13 attaching registers the block with this process's
+    # resource tracker, which unlinks it when the process exits. Calling
+    # unregister() afterwards is not enough: workers started by the owner
+    # through multiprocessing share its tracker, and unregistering there drops
+    # the owner's own registration. So skip registering while attaching.
+    with _attach_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+class SharedInventory:
+    # Owner side: publishes the inventory frame and keeps it in sync
+    def __init__(self, prefix=None):
+        self.prefix = prefix or f"{SHARED_PREFIX}_{os.getpid()}"
+        self.header_shm = _create_header(self.prefix)
+        self.header = np.ndarray((SHARED_HEADER_LEN,), dtype=np.int64, buffer=self.header_shm.buf)
+        self.header[:] = 0
+        self.header[SHARED_OWNER] = os.getpid()
+        with open(SHARED_DISCOVERY, "w", encoding="utf-8") as f:
+            json.dump({"prefix": self.prefix, "pid": os.getpid()}, f)
+        self.data_shm = None
+        self.arrays = {}
+        self.strings = None
+
+    def publish(self, df):
+        strings = [df[col].astype(str).tolist() for col in SHARED_STRINGS]
+        product_ids = df["product_id"].fillna(0).to_numpy(dtype=np.int64)
+        if (self.data_shm is not None and strings == self.strings
+                and np.array_equal(product_ids, self.arrays["product_id"])):
+            # Same rows, only stock/price may have changed: update in place
+            self.arrays["quantity"][:] = df["quantity"].fillna(0).to_numpy(dtype=np.int64)
+            self.arrays["price_paisa"][:] = df["price_paisa"].fillna(0).to_numpy(dtype=np.int64)
+            return
+
+        header = np.zeros(SHARED_HEADER_LEN, dtype=np.int64)
+        header[0] = self.header[0] + 1
+        header[1] = len(df)
+        encoded = []
+        for i, values in enumerate(strings):
+            codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+            blobs = [u.encode("utf-8") for u in uniques]
+            offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(b) for b in blobs])
+            encoded.append((codes, offsets, b"".join(blobs)))
+            header[2 + 2 * i] = len(blobs)
+            header[3 + 2 * i] = offsets[-1]
+
+        layout, size = _shared_layout(header)
+        data_shm = _create_shm(f"{self.prefix}_{header[0]}", size)
+        arrays = {col: np.ndarray((count,), dtype=dtype, buffer=data_shm.buf, offset=offset)
+                  for col, (dtype, offset, count) in layout.items()}
+        arrays["product_id"][:] = product_ids
+        arrays["quantity"][:] = df["quantity"].fillna(0).to_numpy(dtype=np.int64)
+        arrays["price_paisa"][:] = df["price_paisa"].fillna(0).to_numpy(dtype=np.int64)
+        for col, (codes, offsets, blob) in zip(SHARED_STRINGS, encoded):
+            arrays[col + "_codes"][:] = codes
+            arrays[col + "_offsets"][:] = offsets
+            arrays[col + "_blob"][:] = np.frombuffer(blob, dtype=np.uint8)
+
+        # Generation is written last so readers never see a half-built layout
+        self.header[1:SHARED_OWNER] = header[1:SHARED_OWNER]
+        self.header[0] = header[0]
+        self._release_data()
+        self.data_shm, self.arrays, self.strings = data_shm, arrays, strings
+
+    def _release_data(self):
+        if self.data_shm is not None:
+            self.arrays = {}
+            self.data_shm.close()
+            _unlink_shm(self.data_shm)
+            self.data_shm = None
+
+    def close(self):
+        if self.header_shm is None:
+            return  # already closed
+        self._release_data()
+        del self.header
+        self.header_shm.close()
+        _unlink_shm(self.header_shm)
+        self.header_shm = None
+        try:
+            with open(SHARED_DISCOVERY, encoding="utf-8") as f:
+                ours = json.load(f).get("prefix") == self.prefix
+            if ours:
+                os.remove(SHARED_DISCOVERY)
+        except (FileNotFoundError, ValueError):
+            pass
+
+class SharedInventoryView:
+    # Worker side: read-only, zero-copy view of the published inventory.
+    # Without a prefix it attaches to the owner named in shared_inventory.json.
+    def __init__(self, prefix=None):
+        if prefix is None:
+            with open(SHARED_DISCOVERY, encoding="utf-8") as f:
+                prefix = json.load(f)["prefix"]
+        self.prefix = prefix
+        self.header_shm = _attach_shm(f"{prefix}_hdr")
+        self.header = np.ndarray((SHARED_HEADER_LEN,), dtype=np.int64, buffer=self.header_shm.buf)
+        self.generation = 0
+        self.data_shm = None
+        self.arrays = {}
+        self.sync()
+
+    def sync(self):
+        # Re-attach only when the owner has published a new layout
+        while True:
+            generation = int(self.header[0])
+            if generation == self.generation:
+                return
+            header = self.header.copy()
+            try:
+                data_shm = _attach_shm(f"{self.prefix}_{generation}")
+            except FileNotFoundError:
+                continue  # owner replaced it meanwhile, read the header again
+            if int(self.header[0]) == generation:
+                break
+            data_shm.close()
+        layout, _ = _shared_layout(header)
+        self.close_data()
+        self.data_shm, self.generation = data_shm, generation
+        for col, (dtype, offset, count) in layout.items():
+            arr = np.ndarray((count,), dtype=dtype, buffer=data_shm.buf, offset=offset)
+            arr.flags.writeable = False
+            self.arrays[col] = arr
+
+    def column(self, col):
+        self.sync()
+        if col in self.arrays:
+            return self.arrays[col]
+        offsets = self.arrays[col + "_offsets"]
+        blob = self.arrays[col + "_blob"].tobytes()
+        uniques = np.array([blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)], dtype=object)
+        return uniques[self.arrays[col + "_codes"]]
+
+    def frame(self):
+        self.sync()
+        return pd.DataFrame({col: self.column(col) for col in INVENTORY_COLUMNS})
+
+    def close_data(self):
+        if self.data_shm is not None:
+            self.arrays = {}
+            try:
+                self.data_shm.close()
+            except BufferError:
+                pass  # caller still holds a column; the mapping goes when it is dropped
+            self.data_shm = None
+
+    def close(self):
+        self.close_data()
+        del self.header
+        self.header_shm.close()
+
+# ========== Customer Directory ==========
+SALES_COLUMNS = ["date", "time", "customer", "items", "total_paisa", "discount_paisa", "grand_total_paisa"]
+# Name saved when the bill's customer field is left blank
+WALK_IN_CUSTOMER = "Customer"
+
+class CustomerDirectory:
+    def __init__(self, path="sales.csv"):
+        self.path = path
+        self.offset = 0        # bytes of sales.csv already indexed
+        self.keys = []         # sorted lowercase names, searched with bisect for autocomplete
+        self.customers = {}    # key -> running totals for that customer
+        self.ranking = []      # sorted (-spend, key) pairs for top customers
+
+    @staticmethod
+    def key(name):
+        return str(name).strip().lower()
+
+    def refresh(self):
+        # Only index rows appended since the last refresh. Reading under
+        # commit.lock means no commit is half-appended or about to be rolled back.
+        if not os.path.exists(self.path):
+            return
+        with commit_lock():
+            self._read_new()
+
+    def _read_new(self):
+        if os.path.getsize(self.path) < self.offset:
+            self.__init__(self.path)  # file was replaced, rebuild from scratch
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            while True:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break
+                if self.offset > 0:
+                    row = next(csv.reader([line.decode("utf-8")]))
+                    sale = dict(zip(SALES_COLUMNS, row))
+                    if len(row) == len(SALES_COLUMNS) and sale["grand_total_paisa"].lstrip("-").isdigit():
+                        self.record(sale["customer"], int(sale["grand_total_paisa"]), f"{sale['date']} {sale['time']}")
+                self.offset += len(line)  # the first line is the header
+
+    def record(self, name, amount, when):
+        key = self.key(name)
+        if not key or key == self.key(WALK_IN_CUSTOMER):
+            return
+        cust = self.customers.get(key)
+        if cust is None:
+            bisect.insort(self.keys, key)
+            cust = self.customers[key] = {"name": str(name).strip(), "visits": 0, "spend": 0, "last_purchase": ""}
+        else:
+            del self.ranking[bisect.bisect_left(self.ranking, (-cust["spend"], key))]
+        cust["visits"] += 1
+        cust["spend"] += amount
+        if when >= cust["last_purchase"]:
+            cust["last_purchase"] = when
+            cust["name"] = str(name).strip()
+        bisect.insort(self.ranking, (-cust["spend"], key))
+
+    def complete(self, prefix, limit=8):
+        prefix = self.key(prefix)
+        if not prefix:
+            return []
+        matches = []
+        i = bisect.bisect_left(self.keys, prefix)
+        while i < len(self.keys) and self.keys[i].startswith(prefix) and len(matches) < limit:
+            matches.append(self.customers[self.keys[i]]["name"])
+            i += 1
+        return matches
+
+    def lookup(self, name):
+        return self.customers.get(self.key(name))
+
+    def top(self, n=10):
+        return [self.customers[key] for _, key in self.ranking[:n]]
+
+# ========== Report Export ==========
+REPORT_TYPES = ("Line Items", "Per Customer", "Per Category")
+REPORT_COLUMNS = {
+    "Line Items": ["date", "time", "customer", "product_id", "name", "category", "quantity", "price", "total"],
+    "Per Customer": ["customer", "visits", "items", "total", "discount", "grand_total"],
+    "Per Category": ["category", "quantity", "total"],
+}
+# Columns holding paisa amounts, written out in rupees
+REPORT_MONEY = {"price", "total", "discount", "grand_total"}
+REPORT_WIDTHS = {
+    "Line Items": [22, 16, 30, 12, 48, 30, 14, 24, 30],
+    "Per Customer": [80, 20, 25, 50, 40, 50],
+    "Per Category": [120, 60, 85],
+}
+
+def iter_sales(from_date, to_date, chunksize=5000):
+    # Read sales.csv in fixed-size chunks so memory stays flat for any file size
+    if not os.path.exists("sales.csv"):
+        return
+    for chunk in pd.read_csv("sales.csv", chunksize=chunksize):
+        dates = pd.to_datetime(chunk['date'])
+        yield chunk, chunk[(dates >= from_date) & (dates <= to_date)]
+
+def count_sales():
+    if not os.path.exists("sales.csv"):
+        return 0
+    with open("sales.csv", "rb") as f:
+        return max(sum(1 for _ in f) - 1, 0)
+
+class ReportPDF(FPDF):
+    def __init__(self, title, columns, widths):
+        super().__init__(orientation='L')
+        self.title_text = title
+        self.columns = columns
+        self.widths = widths
+        self.set_auto_page_break(True, margin=15)
+
+    def header(self):
+        self.set_font("Arial", 'B', 14)
+        self.cell(0, 8, "Shahbaz Munir ELECTRO Hub", ln=True, align='C')
+        self.set_font("Arial", '', 11)
+        self.cell(0, 6, self.title_text, ln=True, align='C')
+        self.ln(3)
+        self.set_font("Arial", 'B', 9)
+        self.set_fill_color(200, 220, 255)
+        for col, w in zip(self.columns, self.widths):
+            self.cell(w, 7, col, 1, 0, 'C', 1)
+        self.ln()
+        self.set_font("Arial", '', 9)
+
+    def footer(self):
+        self.set_y(-12)
+        self.set_font("Arial", 'I', 8)
+        self.cell(0, 8, f"Page {self.page_no()}", align='C')
+
+    def add_row(self, values):
+        for col, value, w in zip(self.columns, values, self.widths):
+            if col in REPORT_MONEY:
+                text, align = format_rs(value), 'R'
+            elif isinstance(value, (int, np.integer)):
+                text, align = str(value), 'R'
+            else:
+                text, align = str(value), 'L'
+            text = text.encode('latin-1', 'replace').decode('latin-1')
+            self.cell(w, 6, text[:int(w / 1.8)], 1, 0, align)
+        self.ln()
+
+# fpdf keeps a document in memory until output(), so long PDF reports are
+# split into files of at most this many pages
+REPORT_PDF_MAX_PAGES = 100
+
+class ReportWriter:
+    # CSV rows go straight to disk; PDF pages are flushed one part file at a time
+    def __init__(self, filename, fmt, report_type, title, max_pages=REPORT_PDF_MAX_PAGES):
+        self.filename = filename
+        self.fmt = fmt
+        self.title = title
+        self.columns = REPORT_COLUMNS[report_type]
+        self.widths = REPORT_WIDTHS[report_type]
+        self.max_pages = max_pages
+        self.files = []
+        if fmt == "CSV":
+            self.file = open(filename, "w", newline="", encoding="utf-8")
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(self.columns)
+        else:
+            self._new_pdf()
+
+    def _new_pdf(self):
+        part = len(self.files) + 1
+        title = self.title if part == 1 else f"{self.title} (part {part})"
+        self.pdf = ReportPDF(title, self.columns, self.widths)
+        self.pdf.add_page()
+
+    def _part_name(self, part):
+        base, ext = os.path.splitext(self.filename)
+        return f"{base}_part{part}{ext}"
+
+    def write(self, row):
+        if self.fmt == "CSV":
+            self.writer.writerow([format_rs(v) if col in REPORT_MONEY else v for col, v in zip(self.columns, row)])
+            return
+        if self.pdf.page_no() >= self.max_pages and self.pdf.get_y() + 6 > self.pdf.page_break_trigger:
+            # This row would start page max_pages + 1: write out this part first
+            self.files.append(self._part_name(len(self.files) + 1))
+            self.pdf.output(self.files[-1])
+            self._new_pdf()
+        self.pdf.add_row(row)
+
+    def close(self):
+        if self.fmt == "CSV":
+            self.file.close()
+            self.files.append(self.filename)
+        elif self.files:
+            self.files.append(self._part_name(len(self.files) + 1))
+            self.pdf.output(self.files[-1])
+        else:
+            self.pdf.output(self.filename)
+            self.files.append(self.filename)
+
+def export_sales_report(report_type, fmt, from_date, to_date, progress=None, chunksize=5000, max_pages=REPORT_PDF_MAX_PAGES):
+    # Returns the list of files written (several when a PDF is split)
+    inventory = load_inventory()
+    categories = dict(zip(inventory["product_id"], inventory["category"]))
+    total_rows = count_sales()
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    slug = report_type.lower().replace(" ", "_")
+    filename = f"report_{slug}_{stamp}.{fmt.lower()}"
+    title = f"{report_type} Sales Report: {from_date:%d-%b-%Y} to {to_date:%d-%b-%Y}"
+    writer = ReportWriter(filename, fmt, report_type, title, max_pages)
+
+    # Running aggregates grow with customers/categories, never with sales rows
+    per_customer = {}
+    per_category = {}
+    done = 0
+    try:
+        for chunk, sales in iter_sales(from_date, to_date, chunksize):
+            for sale in sales.itertuples(index=False):
+                items = parse_items(sale.items)
+                if report_type == "Line Items":
+                    for item in items:
+                        writer.write([
+                            sale.date, sale.time, sale.customer, item['product_id'], item['name'],
+                            categories.get(item['product_id'], "Unknown"),
+                            item['quantity'], item['price_paisa'], item['total_paisa']
+                        ])
+                elif report_type == "Per Customer":
+                    # Same normalised key as the customer directory; the latest spelling is shown
+                    agg = per_customer.setdefault(CustomerDirectory.key(sale.customer), ["", 0, 0, 0, 0, 0])
+                    agg[0] = str(sale.customer).strip()
+                    agg[1] += 1
+                    agg[2] += sum(int(item['quantity']) for item in items)
+                    agg[3] += int(sale.total_paisa)
+                    agg[4] += int(sale.discount_paisa)
+                    agg[5] += int(sale.grand_total_paisa)
+                else:
+                    for item in items:
+                        cat = categories.get(item['product_id'], "Unknown")
+                        agg = per_category.setdefault(cat, [0, 0])
+                        agg[0] += int(item['quantity'])
+                        agg[1] += int(item['total_paisa'])
+            done += len(chunk)
+            if progress:
+                progress(done, total_rows)
+
+        if report_type == "Per Customer":
+            for agg in sorted(per_customer.values(), key=lambda agg: -agg[5]):
+                writer.write(agg)
+        elif report_type == "Per Category":
+            for cat, agg in sorted(per_category.items(), key=lambda kv: -kv[1][1]):
+                writer.write([cat] + agg)
+    finally:
+        writer.close()
+    return writer.files
 
 # main program
 class ElectronicsShopApp:
     def __init__(self, root):
         self.root = root
         self.root.title("🛒 Electronics Shop Manager")
+        self.monitor = StockMonitor(load_thresholds())
+        self.monitor.follow()
         self.df = load_inventory()
+        self.monitor.rebuild(self.df)
         self.bill_items = []
+        self.customers = CustomerDirectory()
+        self.customers.refresh()
+        self.batcher = CommitBatcher()
+        self.shared = SharedInventory()
+        self.shared.publish(self.df)
+        root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # Set window size and center
         w, h = 1200, 700
@@ -184,6 +1208,8 @@ class ElectronicsShopApp:
         ttk.Button(top_frame, text="🧾 Make Bill", command=self.make_bill, style="Custom.TButton").pack(side="left", padx=6)
         ttk.Button(top_frame, text="🔁 Refresh", command=self.refresh_table, style="Custom.TButton").pack(side="left", padx=6)
         ttk.Button(top_frame, text="📈 Sales Analytics", command=self.show_sales_analytics, style="Custom.TButton").pack(side="left", padx=6)
+        ttk.Button(top_frame, text="📤 Export Report", command=self.export_report, style="Custom.TButton").pack(side="left", padx=6)
+        ttk.Button(top_frame, text="⚠️ Low Stock", command=self.show_low_stock, style="Custom.TButton").pack(side="left", padx=6)
 
         # === Search and Sort Frame ===
         filter_frame = tk.Frame(root, bg="#f4f6fa")
@@ -251,9 +1277,11 @@ class ElectronicsShopApp:
             style="Treeview"
         )
         for col in self.df.columns:
-            self.tree.heading(col, text=col)
+            self.tree.heading(col, text="price (Rs)" if col == "price_paisa" else col)
             self.tree.column(col, width=180, anchor="center")
 
+        self.tree.tag_configure("low", background="#ffd6d6")
+
         vsb = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
         self.tree.configure(yscroll=vsb.set)
         self.tree.pack(side="left", fill="both", expand=True)
@@ -266,12 +1294,35 @@ class ElectronicsShopApp:
         self.set_status("Welcome to Electro Hub Inventory Manager!")
 
         self.refresh_table()
+        self.root.after(STOCK_POLL_MS, self.poll_stock_changes)
 
     def set_status(self, msg):
         self.status_var.set(msg)
 
-    # Refresh table with search & sort
+    def notify_low_stock(self, pids):
+        if not pids:
+            return
+        lines = [f"{e['name']}: {e['quantity']} left (min {e['minimum']})" for e in (self.monitor.entries[p] for p in pids)]
+        self.set_status("⚠️ Low stock: " + " | ".join(lines))
+        messagebox.showwarning("Low Stock", "Stock dropped below minimum:\n" + "\n".join(lines))
+
+    def poll_stock_changes(self):
+        # Stock sold or edited at other counters
+        if self.monitor.has_changes():
+            newly_low = self.refresh_table()
+            self.shared.publish(self.df)
+            self.notify_low_stock(newly_low)
+        self.root.after(STOCK_POLL_MS, self.poll_stock_changes)
+
+    def on_close(self):
+        self.batcher.close()
+        self.shared.close()
+        self.root.destroy()
+
+    # Refresh table with search & sort; returns the products that just dropped
+    # below their minimum
     def refresh_table(self):
+        newly_low = self.monitor.sync()
         self.df = load_inventory()
         search_text = self.search_var.get().lower()
         df_filtered = self.df[
@@ -290,12 +1341,14 @@ class ElectronicsShopApp:
 
         self.tree.delete(*self.tree.get_children())
         for _, row in df_filtered.iterrows():
-            self.tree.insert("", "end", values=list(row))
+            tags = ("low",) if row["product_id"] in self.monitor.low else ()
+            self.tree.insert("", "end", values=[format_rs(v) if col == "price_paisa" else v for col, v in row.items()], tags=tags)
 
         # Scroll to last item
         children = self.tree.get_children()
         if children:
             self.tree.see(children[-1])
+        return newly_low
 
     def add_product(self):
         win = tk.Toplevel(self.root)
@@ -360,7 +1413,7 @@ class ElectronicsShopApp:
                 brand = brand_var.get().strip()
                 cat = cat_var.get().strip()
                 qty = int(qty_var.get())
-                price = float(price_var.get())
+                price = to_paisa(price_var.get())
                 if not name or not brand or not cat:
                     messagebox.showerror("Error", "All fields are required!", parent=win)
                     return
@@ -370,13 +1423,23 @@ class ElectronicsShopApp:
                     "brand": brand,
                     "category": cat,
                     "quantity": qty,
-                    "price": price
+                    "price_paisa": price
                 }])
-                self.df = pd.concat([self.df, new_row], ignore_index=True)
-                save_inventory(self.df)
-                self.refresh_table()
+                with commit_lock():
+                    # Reload so stock sold meanwhile by other counters is kept
+                    df = load_inventory()
+                    exists = pid in df['product_id'].values
+                    if not exists:
+                        save_inventory(pd.concat([df, new_row], ignore_index=True))
+                        log_stock_changes([{"pid": pid, "name": name, "category": cat, "qty": qty}])
+                if exists:
+                    messagebox.showerror("Error", "Product ID already exists!", parent=win)
+                    return
+                newly_low = self.refresh_table()
+                self.shared.publish(self.df)
                 win.destroy()
                 messagebox.showinfo("Success", "Product added successfully.")
+                self.notify_low_stock(newly_low)
             except Exception as e:
                 messagebox.showerror("Error", f"Invalid input! {e}", parent=win)
 
@@ -408,15 +1471,25 @@ class ElectronicsShopApp:
                 brand = brand_var.get().strip()
                 cat = cat_var.get().strip()
                 qty = int(qty_var.get())
-                price = float(price_var.get())
+                price = to_paisa(price_var.get())
                 if not name or not brand or not cat:
                     messagebox.showerror("Error", "All fields are required!", parent=win)
                     return
-                self.df.loc[self.df["product_id"] == pid, ["name", "brand", "category", "quantity", "price"]] = [name, brand, cat, qty, price]
-                save_inventory(self.df)
-                self.refresh_table()
+                with commit_lock():
+                    df = load_inventory()
+                    row = df["product_id"] == pid
+                    if row.any():
+                        df.loc[row, ["name", "brand", "category", "quantity", "price_paisa"]] = [name, brand, cat, qty, price]
+                        save_inventory(df)
+                        log_stock_changes([{"pid": pid, "name": name, "category": cat, "qty": qty}])
+                if not row.any():
+                    messagebox.showerror("Error", "Product was deleted by another counter!", parent=win)
+                    return
+                newly_low = self.refresh_table()
+                self.shared.publish(self.df)
                 win.destroy()
                 messagebox.showinfo("Success", "Product edited successfully.")
+                self.notify_low_stock(newly_low)
             except Exception as e:
                 messagebox.showerror("Error", f"Invalid input! {e}", parent=win)
 
@@ -459,7 +1532,7 @@ class ElectronicsShopApp:
         tk.Entry(frame, textvariable=qty_var, font=font).pack()
 
         tk.Label(frame, text="Price:", font=font).pack(pady=(10, 2))
-        price_var = tk.StringVar(value=str(product['price']))
+        price_var = tk.StringVar(value=format_rs(product['price_paisa']))
         tk.Entry(frame, textvariable=price_var, font=font).pack()
 
         tk.Button(frame, text="Update Product", font=font, bg="#2d4059", fg="#fff", command=submit).pack(pady=18)
@@ -475,9 +1548,12 @@ class ElectronicsShopApp:
         pid = item['values'][0]
 
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this product?"):
-            self.df = self.df[self.df["product_id"] != pid]
-            save_inventory(self.df)
+            with commit_lock():
+                df = load_inventory()
+                save_inventory(df[df["product_id"] != pid])
+                log_stock_changes([{"pid": pid, "deleted": True}])
             self.refresh_table()
+            self.shared.publish(self.df)
             messagebox.showinfo("Deleted", "Product deleted successfully.")
 
     def add_to_bill(self):
@@ -503,18 +1579,18 @@ class ElectronicsShopApp:
                             messagebox.showerror("Error", "Total quantity in bill exceeds available stock!", parent=win)
                             return
                         bill_item['quantity'] += qty
-                        bill_item['total'] = bill_item['quantity'] * bill_item['price']
+                        bill_item['total_paisa'] = bill_item['quantity'] * bill_item['price_paisa']
                         messagebox.showinfo("Updated", f"Updated quantity for {product['name']} in bill.", parent=win)
                         win.destroy()
                         return
                 else:
-                    total_price = qty * product['price']
+                    price = int(product['price_paisa'])
                     self.bill_items.append({
-                        "product_id": pid,
-                        "name": product['name'],
+                        "product_id": int(pid),
+                        "name": str(product['name']),
                         "quantity": qty,
-                        "price": product['price'],
-                        "total": total_price
+                        "price_paisa": price,
+                        "total_paisa": qty * price
                     })
                     messagebox.showinfo("Added", f"Added {qty} x {product['name']} to bill.", parent=win)
                     win.destroy()
@@ -591,7 +1667,7 @@ class ElectronicsShopApp:
             tree.delete(*tree.get_children())
             for idx, item in enumerate(self.bill_items):
                 tree.insert("", "end", iid=idx, values=(
-                    item['name'], item['quantity'], f"{item['price']:.2f}", f"{item['total']:.2f}", "Edit", "Delete"
+                    item['name'], item['quantity'], format_rs(item['price_paisa']), format_rs(item['total_paisa']), "Edit", "Delete"
                 ))
 
         refresh_tree()
@@ -634,7 +1710,7 @@ class ElectronicsShopApp:
                         messagebox.showerror("Error", "Quantity exceeds available stock!", parent=win)
                         return
                     self.bill_items[idx]['quantity'] = qty
-                    self.bill_items[idx]['total'] = qty * self.bill_items[idx]['price']
+                    self.bill_items[idx]['total_paisa'] = qty * self.bill_items[idx]['price_paisa']
                     refresh_tree()
                     win.destroy()
                 except Exception:
@@ -647,6 +1723,30 @@ class ElectronicsShopApp:
         name_var = tk.StringVar()
         tk.Entry(dialog, textvariable=name_var, font=font, width=18).grid(row=1, column=1, pady=(8, 2), sticky="w")
 
+        # Customer autocomplete from the customer directory
+        suggest_box = tk.Listbox(dialog, font=font, height=3, width=22, exportselection=False)
+        suggest_box.grid(row=1, column=2, rowspan=2, columnspan=2, padx=10, pady=(8, 2), sticky="nw")
+        customer_info = tk.Label(dialog, text="", font=("Segoe UI", 10), fg="#2d4059")
+        customer_info.grid(row=3, column=2, columnspan=2, padx=10, sticky="w")
+
+        def update_suggestions(*args):
+            suggest_box.delete(0, "end")
+            for name in self.customers.complete(name_var.get()):
+                suggest_box.insert("end", name)
+            cust = self.customers.lookup(name_var.get())
+            if cust:
+                customer_info.config(text=f"Visits: {cust['visits']} | Lifetime: Rs {format_rs(cust['spend'])} | Last: {cust['last_purchase']}")
+            else:
+                customer_info.config(text="")
+
+        def pick_suggestion(event):
+            selection = suggest_box.curselection()
+            if selection:
+                name_var.set(suggest_box.get(selection[0]))
+
+        name_var.trace("w", update_suggestions)
+        suggest_box.bind("<<ListboxSelect>>", pick_suggestion)
+
         tk.Label(dialog, text="Discount (Rs):", font=font).grid(row=2, column=0, padx=10, pady=(2, 10), sticky="e")
         discount_var = tk.StringVar(value="0")
         tk.Entry(dialog, textvariable=discount_var, font=font, width=10).grid(row=2, column=1, pady=(2, 10), sticky="w")
@@ -654,34 +1754,63 @@ class ElectronicsShopApp:
         # Generate Invoice Button
         def submit_bill():
             try:
-                customer_name = name_var.get().strip() or "Customer"
+                customer_name = name_var.get().strip() or WALK_IN_CUSTOMER
                 try:
-                    discount = float(discount_var.get())
+                    discount = to_paisa(discount_var.get())
                     if discount < 0:
                         raise ValueError
                 except Exception:
                     messagebox.showerror("Error", "Discount must be a non-negative number!", parent=dialog)
                     return
 
-                total_amount = sum(item['total'] for item in self.bill_items)
-                invoice_file = generate_invoice(self.bill_items, total_amount, customer_name, discount)
-                save_sale(self.bill_items, total_amount, customer_name, discount)
+                items = [dict(item) for item in self.bill_items]
+                total_amount = cart_total(items)
+
+                # Sale row and stock update are committed together by the batcher
+                decrements = {}
+                for item in items:
+                    decrements[item['product_id']] = decrements.get(item['product_id'], 0) + item['quantity']
+                row = sale_row(items, total_amount, customer_name, discount)
+                future = self.batcher.submit(row, decrements)
+                generate_btn.config(state="disabled")
+                self.set_status("Saving sale...")
+                self.root.after(10, lambda: finish_bill(future, items, total_amount, customer_name, discount))
+            except Exception as e:
+                messagebox.showerror("Error", f"Exception: {e}", parent=dialog)
 
-                # Update stock in inventory
-                for item in self.bill_items:
-                    idx = self.df.index[self.df["product_id"] == item['product_id']][0]
-                    self.df.at[idx, "quantity"] -= item['quantity']
-                save_inventory(self.df)
+        # Runs on the Tk thread once the batcher has acknowledged the checkout
+        def finish_bill(future, items, total_amount, customer_name, discount):
+            if not future.done():
+                self.root.after(10, lambda: finish_bill(future, items, total_amount, customer_name, discount))
+                return
+            parent = dialog if dialog.winfo_exists() else self.root
+            if dialog.winfo_exists():
+                generate_btn.config(state="normal")
+            try:
+                future.result()
+            except Exception as e:
+                self.set_status("Sale was not saved.")
+                messagebox.showerror("Error", f"Sale not saved! {e}", parent=parent)
+                return
+            try:
+                invoice_file = generate_invoice(items, total_amount, customer_name, discount)
+                self.customers.refresh()
                 self.bill_items.clear()
-                self.refresh_table()
+                newly_low = self.refresh_table()
+                self.shared.publish(self.df)
+                stats = self.batcher.stats()
+                self.set_status(f"Sale saved. Checkouts/s (last {COMMIT_STATS_WINDOW} s): {stats['checkouts_per_sec']:.2f} | Batches: {stats['batches']} | Busy: {stats['busy_seconds']:.2f} s | Batch sizes: {stats['batch_sizes']}")
 
                 messagebox.showinfo("Invoice Generated", f"Invoice saved to:\n{invoice_file}")
                 webbrowser.open_new_tab(invoice_file)
-                dialog.destroy()
+                if dialog.winfo_exists():
+                    dialog.destroy()
+                self.notify_low_stock(newly_low)
             except Exception as e:
-                messagebox.showerror("Error", f"Exception: {e}", parent=dialog)
+                messagebox.showerror("Error", f"Exception: {e}", parent=parent)
 
-        tk.Button(dialog, text="Generate Invoice", font=font, bg="#2d4059", fg="#fff", command=submit_bill).grid(row=3, column=0, columnspan=2, pady=(0, 18))
+        generate_btn = tk.Button(dialog, text="Generate Invoice", font=font, bg="#2d4059", fg="#fff", command=submit_bill)
+        generate_btn.grid(row=3, column=0, columnspan=2, pady=(0, 18))
 
         dialog.wait_window()
 
@@ -719,14 +1848,13 @@ class ElectronicsShopApp:
                 return
 
             # Total sales
-            total_sales = df['grand_total'].sum()
-            tk.Label(win, text=f"Total Sales: Rs {total_sales:.2f}", font=(font[0], font[1]+2, "bold")).pack(pady=8)
+            total_sales = df['grand_total_paisa'].to_numpy(dtype=np.int64).sum()
+            tk.Label(win, text=f"Total Sales: Rs {format_rs(total_sales)}", font=(font[0], font[1]+2, "bold")).pack(pady=8)
 
             # Product-wise sales
             all_items = []
             for items_json in df['items']:
-                items = json.loads(items_json.replace("'", '"'))
-                all_items.extend(items)
+                all_items.extend(parse_items(items_json))
             items_df = pd.DataFrame(all_items)
             prod_sales = items_df.groupby('name')['quantity'].sum().sort_values(ascending=True)  # ascending for horizontal
 
@@ -766,12 +1894,203 @@ class ElectronicsShopApp:
 
         tk.Button(win, text="Show Analytics", font=font, bg="#2d4059", fg="#fff", command=analyze).pack(pady=12)
 
+        def top_customers():
+            self.customers.refresh()
+            top = self.customers.top(10)
+            if not top:
+                messagebox.showinfo("No Data", "No sales data found.", parent=win)
+                return
+            lines = [f"{i}. {c['name']} - Rs {format_rs(c['spend'])} ({c['visits']} visits, last {c['last_purchase']})"
+                     for i, c in enumerate(top, 1)]
+            messagebox.showinfo("Top Customers", "\n".join(lines), parent=win)
+
+        tk.Button(win, text="Top Customers", font=font, bg="#2d4059", fg="#fff", command=top_customers).pack()
+
+    def show_low_stock(self):
+        win = tk.Toplevel(self.root)
+        win.title("Low Stock Alerts")
+        win.geometry("700x660")
+        font = ("Segoe UI", 12)
+
+        columns = ("product_id", "name", "category", "quantity", "minimum")
+
+        def make_table(title):
+            tk.Label(win, text=title, font=(font[0], font[1], "bold")).pack(pady=(10, 0))
+            table = ttk.Treeview(win, columns=columns, show="headings", height=6)
+            for col in columns:
+                table.heading(col, text=col)
+                table.column(col, width=120, anchor="center")
+            table.column("name", width=200)
+            table.pack(fill="both", expand=True, padx=10, pady=(2, 6))
+            return table
+
+        low_tree = make_table("Below minimum")
+        nearest_tree = make_table("Closest to minimum")
+
+        def refresh_alerts():
+            for table, rows in ((low_tree, self.monitor.alerts()), (nearest_tree, self.monitor.nearest(10))):
+                table.delete(*table.get_children())
+                for e in rows:
+                    table.insert("", "end", values=(e['product_id'], e['name'], e['category'], e['quantity'], e['minimum']))
+            self.refresh_table()
+
+        # Minimum stock for the product selected in the main table
+        form = tk.Frame(win)
+        form.pack(pady=(0, 10))
+        selected_label = tk.Label(form, text="", font=font, fg="#2d4059")
+        selected_label.grid(row=0, column=0, columnspan=3, pady=(0, 4))
+        tk.Label(form, text="Min for selected product:", font=font).grid(row=1, column=0, sticky="e", padx=4, pady=4)
+        product_min_var = tk.StringVar()
+        tk.Entry(form, textvariable=product_min_var, font=font, width=8).grid(row=1, column=1, pady=4)
+        tk.Label(form, text="Min for its category:", font=font).grid(row=2, column=0, sticky="e", padx=4, pady=4)
+        category_min_var = tk.StringVar()
+        tk.Entry(form, textvariable=category_min_var, font=font, width=8).grid(row=2, column=1, pady=4)
+
+        # Product the fields were filled for, and the values they were filled with
+        current = {"pid": None, "product": "", "category": ""}
+
+        def fill_fields(event=None):
+            # An empty selection (e.g. the table was just refreshed) keeps the current product
+            selected = self.tree.selection()
+            if event is not None and not selected:
+                return  # don't throw away values being typed
+            if selected:
+                current["pid"] = int(self.tree.item(selected)['values'][0])
+            entry = self.monitor.entries.get(current["pid"])
+            if entry is None:
+                current.update(pid=None, product="", category="")
+                selected_label.config(text="Select a product in the main table")
+            else:
+                current["product"] = str(self.monitor.thresholds["products"].get(str(current["pid"]), ""))
+                current["category"] = str(self.monitor.thresholds["categories"].get(entry['category'], ""))
+                selected_label.config(text=f"{entry['name']} ({entry['category']})")
+            product_min_var.set(current["product"])
+            category_min_var.set(current["category"])
+
+        def save_minimums():
+            entry = self.monitor.entries.get(current["pid"])
+            if entry is None:
+                messagebox.showwarning("Warning", "Select a product in the main table first!", parent=win)
+                return
+            product_text = product_min_var.get().strip()
+            category_text = category_min_var.get().strip()
+            try:
+                # Blank clears the override and falls back to category/default
+                product_min = int(product_text) if product_text else None
+                category_min = int(category_text) if category_text else None
+            except ValueError:
+                messagebox.showerror("Error", "Minimum stock must be a whole number!", parent=win)
+                return
+            # Only thresholds whose field was actually edited are changed
+            if category_text != current["category"]:
+                self.monitor.set_category_minimum(entry['category'], category_min)
+            if product_text != current["product"]:
+                self.monitor.set_product_minimum(current["pid"], product_min)
+            save_thresholds(self.monitor.thresholds)
+            refresh_alerts()
+            fill_fields()
+            self.set_status(f"Minimum stock updated for {entry['name']}.")
+
+        tk.Button(form, text="Save Minimums", font=font, bg="#2d4059", fg="#fff", command=save_minimums).grid(row=1, column=2, rowspan=2, padx=12)
+
+        # Keep the fields in step with the main table selection while open
+        bind_id = self.tree.bind("<<TreeviewSelect>>", fill_fields, add="+")
+        win.bind("<Destroy>", lambda e: self.tree.unbind("<<TreeviewSelect>>", bind_id) if e.widget is win else None)
+
+        refresh_alerts()
+        fill_fields()
+
+    def export_report(self):
+        win = tk.Toplevel(self.root)
+        win.title("Export Sales Report")
+        win.transient(self.root)
+        win.grab_set()
+        win.resizable(False, False)
+        font = ("Segoe UI", 12)
+
+        # Center the window on the parent
+        win.update_idletasks()
+        w, h = 400, 380
+        x = self.root.winfo_x() + (self.root.winfo_width() // 2) - (w // 2)
+        y = self.root.winfo_y() + (self.root.winfo_height() // 2) - (h // 2)
+        win.geometry(f"{w}x{h}+{x}+{y}")
+
+        frame = tk.Frame(win)
+        frame.pack(expand=True, fill="both", pady=10)
+
+        tk.Label(frame, text="From (YYYY-MM-DD):", font=font).pack(pady=(10, 2))
+        from_var = tk.StringVar(value=datetime.now().strftime('%Y-01-01'))
+        tk.Entry(frame, textvariable=from_var, font=font).pack()
+
+        tk.Label(frame, text="To (YYYY-MM-DD):", font=font).pack(pady=(10, 2))
+        to_var = tk.StringVar(value=datetime.now().strftime('%Y-%m-%d'))
+        tk.Entry(frame, textvariable=to_var, font=font).pack()
+
+        tk.Label(frame, text="Report:", font=font).pack(pady=(10, 2))
+        type_var = tk.StringVar(value=REPORT_TYPES[0])
+        type_menu = tk.OptionMenu(frame, type_var, *REPORT_TYPES)
+        type_menu.config(font=font, width=14)
+        type_menu.pack()
+
+        tk.Label(frame, text="Format:", font=font).pack(pady=(10, 2))
+        fmt_var = tk.StringVar(value="CSV")
+        fmt_menu = tk.OptionMenu(frame, fmt_var, "CSV", "PDF")
+        fmt_menu.config(font=font, width=14)
+        fmt_menu.pack()
+
+        # Written by the export thread, read by poll_export on the Tk thread
+        state = {"done": 0, "total": 0, "files": None, "error": None}
+
+        def progress(done, total):
+            state["done"], state["total"] = done, total
+
+        def run_export(report_type, fmt, from_date, to_date):
+            try:
+                state["files"] = export_sales_report(report_type, fmt, from_date, to_date, progress)
+            except Exception as e:
+                state["error"] = e
+
+        def poll_export(thread):
+            if thread.is_alive():
+                done, total = state["done"], state["total"]
+                pct = (done * 100 // total) if total else 0
+                self.set_status(f"Exporting report... {done}/{total} sales ({pct}%)")
+                self.root.after(100, lambda: poll_export(thread))
+                return
+            if state["error"] is not None:
+                self.set_status("Report export failed.")
+                messagebox.showerror("Error", f"Export failed! {state['error']}")
+                return
+            files = state["files"]
+            self.set_status(f"Report exported to {', '.join(files)}")
+            messagebox.showinfo("Report Exported", "Report saved to:\n" + "\n".join(files))
+            webbrowser.open_new_tab(files[0])
+
+        def submit():
+            try:
+                from_date = pd.to_datetime(from_var.get())
+                to_date = pd.to_datetime(to_var.get())
+            except Exception:
+                messagebox.showerror("Error", "Invalid date format!", parent=win)
+                return
+            if not os.path.exists("sales.csv"):
+                messagebox.showinfo("No Data", "No sales data found.", parent=win)
+                return
+            thread = threading.Thread(target=run_export, args=(type_var.get(), fmt_var.get(), from_date, to_date), daemon=True)
+            thread.start()
+            win.destroy()
+            self.set_status("Exporting report...")
+            self.root.after(100, lambda: poll_export(thread))
+
+        tk.Button(frame, text="Export", font=font, bg="#2d4059", fg="#fff", command=submit).pack(pady=18)
+
 # ========== Main Application ==========
 
 
 
 
 if __name__ == "__main__":
+    convert_money_files()
     root = tk.Tk()
     app = ElectronicsShopApp(root)
     root.mainloop()
@@ -0,0 +1,17 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def shop(tmp_path, monkeypatch):
+    # The app works on files in the current directory: run each test in a copy
+    for name in ("inventory.csv", "sales.csv"):
+        shutil.copyfile(os.path.join(ROOT, name), tmp_path / name)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,99 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import main
+
+
+def sale(customer, pid, qty):
+    return main.sale_row([{"product_id": pid, "name": "Laptop", "quantity": qty, "price_paisa": 100, "total_paisa": 100 * qty}], 100 * qty, customer, 0)
+
+
+def stock(pid):
+    df = main.load_inventory()
+    return int(df.loc[df["product_id"] == pid, "quantity"].iloc[0])
+
+
+def test_checkouts_in_one_window_share_a_commit(shop):
+    batcher = main.CommitBatcher(window_ms=200)
+    sales_before = os.path.getsize("sales.csv")
+    futures = [batcher.submit(sale(f"C{i}", 2, 1), {2: 1}) for i in range(3)]
+    results = [f.result(timeout=10) for f in futures]
+    batcher.close()
+    assert [r[2] for r in results] == [4, 4, 4]  # acks carry the stock left after the batch
+    assert stock(2) == 4
+    stats = batcher.stats()
+    assert stats["checkouts"] == 3
+    assert stats["batch_sizes"] == {3: 1}
+    assert stats["checkouts_per_sec"] > 0
+    assert stats["busy_seconds"] > 0
+    assert os.path.getsize("sales.csv") > sales_before
+    assert os.listdir(main.COMMIT_SPOOL) == []
+
+
+def test_checkout_is_rejected_when_stock_runs_out(shop):
+    batcher = main.CommitBatcher(window_ms=200)
+    first = batcher.submit(sale("A", 2, 5), {2: 5})
+    second = batcher.submit(sale("B", 2, 5), {2: 5})
+    assert first.result(timeout=10) == {2: 2}
+    with pytest.raises(ValueError, match="Not enough stock"):
+        second.result(timeout=10)
+    batcher.close()
+    assert stock(2) == 2
+    assert batcher.stats()["checkouts"] == 1
+
+
+def test_acks_of_exited_counters_are_cleaned_up(shop):
+    dead = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True).stdout.strip()
+    os.makedirs(main.COMMIT_SPOOL, exist_ok=True)
+    orphan = os.path.join(main.COMMIT_SPOOL, f"{dead}-0.ack")
+    main._write_json(orphan, {"remaining": {}})
+    batcher = main.CommitBatcher()
+    batcher.submit(sale("A", 2, 1), {2: 1}).result(timeout=10)
+    batcher.close()
+    assert not os.path.exists(orphan)
+
+
+def test_failed_inventory_write_rolls_back_the_sales_append(shop, monkeypatch):
+    def broken(df):
+        raise OSError("disk full")
+    monkeypatch.setattr(main, "save_inventory", broken)
+    with open("sales.csv", "rb") as f:
+        sales_before = f.read()
+    batcher = main.CommitBatcher()
+    future = batcher.submit(sale("A", 2, 1), {2: 1})
+    with pytest.raises(ValueError, match="disk full"):
+        future.result(timeout=10)
+    batcher.close()
+    with open("sales.csv", "rb") as f:
+        assert f.read() == sales_before
+    assert stock(2) == 7
+    assert not os.path.exists(main.COMMIT_INTENT)
+
+
+def test_interrupted_commit_is_finished_once(shop):
+    os.makedirs(main.COMMIT_SPOOL, exist_ok=True)
+    spooled = os.path.join(main.COMMIT_SPOOL, "1-0.json")
+    ack = os.path.join(main.COMMIT_SPOOL, "1-0.ack")
+    with open(spooled, "w") as f:
+        json.dump({"row": sale("Zara", 2, 1), "decrements": {"2": 1}}, f)
+    sales_size = os.path.getsize("sales.csv")
+    text = '2026-01-01,10:00:00,Zara,"[]",100,0,100\n'
+    intent = {"sales_size": sales_size, "sales_text": text, "stock": {"2": 6}, "acks": {ack: {"remaining": {"2": 6}}}, "spooled": [spooled]}
+    main._write_json(main.COMMIT_INTENT, intent)
+    # The crash came after the append but before inventory.csv was written
+    with open("sales.csv", "a", newline="") as f:
+        f.write(text)
+
+    with main.commit_lock():
+        pass
+    with main.commit_lock():
+        pass
+    assert os.path.getsize("sales.csv") == sales_size + len(text)
+    assert stock(2) == 6
+    assert os.path.exists(ack)
+    assert not os.path.exists(spooled)
+    assert not os.path.exists(main.COMMIT_INTENT)
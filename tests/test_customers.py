@@ -0,0 +1,34 @@
+import main
+
+
+def test_directory_totals_and_autocomplete(shop):
+    directory = main.CustomerDirectory()
+    directory.refresh()
+    amir = directory.lookup("  AMIR majeed ")
+    assert amir["visits"] == 2
+    assert amir["spend"] == 67170000
+    assert directory.complete("a") == ["Abdullah majeed", "ahmad", "Amir Majeed"]
+    assert [c["name"] for c in directory.top(2)] == ["ahmad", "Amir Majeed"]
+
+
+def test_refresh_is_incremental_and_skips_partial_rows(shop):
+    directory = main.CustomerDirectory()
+    directory.refresh()
+    row = '2026-01-01,10:00:00,Zara,"[]",500,0,500\r\n'
+    with open("sales.csv", "a", newline="") as f:
+        f.write(row[:20])  # another counter is mid-append
+    directory.refresh()
+    assert directory.lookup("zara") is None
+    with open("sales.csv", "a", newline="") as f:
+        f.write(row[20:])
+    directory.refresh()
+    assert directory.lookup("zara")["spend"] == 500
+    directory.refresh()
+    assert directory.lookup("zara")["visits"] == 1
+
+
+def test_walk_in_placeholder_is_not_a_customer(shop):
+    directory = main.CustomerDirectory()
+    directory.record(main.WALK_IN_CUSTOMER, 100, "2026-01-01 10:00:00")
+    assert directory.lookup(main.WALK_IN_CUSTOMER) is None
+    assert directory.complete("cust") == []
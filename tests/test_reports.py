@@ -0,0 +1,34 @@
+import pandas as pd
+
+import main
+
+ALL_TIME = (pd.to_datetime("2000-01-01"), pd.to_datetime("2100-01-01"))
+
+
+def test_per_customer_report_merges_spellings(shop):
+    files = main.export_sales_report("Per Customer", "CSV", *ALL_TIME)
+    report = pd.read_csv(files[0])
+    amir = report[report["customer"].str.lower() == "amir majeed"]
+    assert len(amir) == 1
+    assert amir.iloc[0]["visits"] == 2
+    assert amir.iloc[0]["grand_total"] == 671700.00
+
+
+def test_line_items_pdf_is_split_into_bounded_parts(shop):
+    sales = pd.read_csv("sales.csv")
+    pd.concat([sales] * 150).to_csv("sales.csv", index=False)
+    progress = []
+    files = main.export_sales_report("Line Items", "PDF", *ALL_TIME,
+                                     progress=lambda done, total: progress.append((done, total)),
+                                     chunksize=100, max_pages=3)
+    assert len(files) > 1
+    assert all("_part" in f for f in files)
+    for f in files:
+        with open(f, "rb") as pdf:
+            assert pdf.read().count(b"/Type /Page\n") <= 3
+    assert progress[-1] == (600, 600)
+
+
+def test_small_pdf_is_a_single_file(shop):
+    files = main.export_sales_report("Per Category", "PDF", *ALL_TIME)
+    assert len(files) == 1 and "_part" not in files[0]
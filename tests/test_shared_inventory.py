@@ -0,0 +1,92 @@
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+import main
+from conftest import ROOT
+
+WORKER = f"""
+import sys
+sys.path.insert(0, {ROOT!r})
+import main
+view = main.SharedInventoryView()
+print(int(view.frame()["quantity"].sum()))
+view.close()
+"""
+
+
+def run_worker():
+    # A worker started on its own, finding the owner through shared_inventory.json
+    return subprocess.run([sys.executable, "-c", WORKER], capture_output=True, text=True, timeout=60)
+
+
+def read_quantity(queue):
+    view = main.SharedInventoryView()
+    queue.put(int(view.column("quantity")[0]))
+    view.close()
+
+
+def test_independent_worker_exit_keeps_owner_blocks(shop):
+    owner = main.SharedInventory()
+    df = main.load_inventory()
+    owner.publish(df)
+    try:
+        for _ in range(2):
+            result = run_worker()
+            assert result.returncode == 0, result.stderr
+            assert int(result.stdout) == df["quantity"].sum()
+            assert "leaked" not in result.stderr
+        view = main.SharedInventoryView()
+        assert view.column("name")[0] == df["name"][0]
+        view.close()
+    finally:
+        owner.close()
+
+
+def test_multiprocessing_worker_sees_stock_updates(shop):
+    owner = main.SharedInventory()
+    df = main.load_inventory()
+    owner.publish(df)
+    try:
+        ctx = mp.get_context("spawn")
+        queue = ctx.Queue()
+        for expected in (int(df.at[0, "quantity"]), 3):
+            df.at[0, "quantity"] = expected
+            owner.publish(df)
+            p = ctx.Process(target=read_quantity, args=(queue,))
+            p.start()
+            assert queue.get(timeout=60) == expected
+            p.join()
+        assert run_worker().returncode == 0
+    finally:
+        owner.close()
+
+
+def test_second_owner_of_live_prefix_is_refused(shop):
+    owner = main.SharedInventory()
+    try:
+        try:
+            main.SharedInventory(owner.prefix)
+        except FileExistsError:
+            pass
+        else:
+            raise AssertionError("second owner took over a live prefix")
+    finally:
+        owner.close()
+    owner.close()  # already unlinked: must not raise
+    assert not os.path.exists(main.SHARED_DISCOVERY)
+
+
+def test_view_is_read_only(shop):
+    owner = main.SharedInventory()
+    owner.publish(main.load_inventory())
+    view = main.SharedInventoryView()
+    try:
+        assert not view.column("quantity").flags.writeable
+        assert view.column("price_paisa").dtype == np.int64
+    finally:
+        view.close()
+        owner.close()
@@ -0,0 +1,38 @@
+import main
+
+
+def test_sync_rescores_only_products_changed_at_other_counters(shop):
+    monitor = main.StockMonitor(main.load_thresholds())
+    monitor.follow()
+    monitor.rebuild(main.load_inventory())
+    before = dict(monitor.entries)
+    assert 2 not in monitor.low
+
+    # Another counter sells three laptops and renames a product
+    batcher = main.CommitBatcher()
+    batcher.submit(main.sale_row([], 0, "A", 0), {2: 3}).result(timeout=10)
+    batcher.close()
+    with main.commit_lock():
+        main.log_stock_changes([{"pid": 3, "name": "Phone", "category": "Mobile", "qty": 15}])
+
+    assert monitor.has_changes()
+    assert monitor.sync() == [2]
+    assert monitor.entries[2]["quantity"] == 4
+    assert monitor.entries[3]["name"] == "Phone"
+    assert all(monitor.entries[pid] is before[pid] for pid in before if pid not in (2, 3))
+    assert not monitor.has_changes()
+    assert monitor.sync() == []
+
+
+def test_sync_waits_for_complete_lines_and_applies_deletes(shop):
+    monitor = main.StockMonitor(main.load_thresholds())
+    monitor.follow()
+    monitor.rebuild(main.load_inventory())
+    with open(main.STOCK_LOG, "a") as f:
+        f.write('{"pid": 4, "del')
+    assert monitor.sync() == []
+    assert 4 in monitor.entries
+    with open(main.STOCK_LOG, "a") as f:
+        f.write('eted": true}\n')
+    monitor.sync()
+    assert 4 not in monitor.entries